@@ -1,6 +1,10 @@
 from __future__ import annotations
 
-from flask import Flask, jsonify, request
+import threading
+
+import click
+from flask import Blueprint, Flask, Response, request
+import orjson
 
 from myrepository import *
 
@@ -8,95 +12,302 @@ from myrepository import *
 """
 Начало работы REST API сервиса
 """
-app = Flask(__name__)  # инициализация объекта, с которым сможет работать WSGI сервер
-app.config['SECRET_KEY'] = 'gh5ng843bh68hfi4nfc6h3ndh4xc53b56lk89gm4bf2gc6ehm'  # произвольная случайная длинная строка
+bp = Blueprint("users", __name__)  # точки входа сервиса; регистрируются в приложении функцией create_app()
 factory = UserFactory()  # инициализация фабрики сущностей пользователей
-repo = RepositoryCreator.create(factory)  # инициализация репозитория
+EMPTY = factory.empty_entity  # пустая сущность; репозиторий возвращает именно её, поэтому сравнение через is
+repo = None  # репозиторий создаётся при первом обращении, см. get_repo()
+repo_lock = threading.Lock()
+MSG_NO_USER = "Rejected. No user with id=%d"  # шаблоны ответов об ошибках, в которые подставляется id
+MSG_USER_EXISTS = "Rejected. User with id=%d already exists"
+MSG_NOT_STORABLE = "Rejected. User with id=%d can not be stored in the repository"
+MSG_REPO_FAILURE = "Rejected. Repository is unavailable"
+MSG_WRONG_TITLE = "Rejected. Title is missing, empty or does not fit into the repository"
+MSG_NO_USERS_WITH_TITLE = "Rejected. No users with title=%s"
+
+
+def get_repo() -> AbstractRepository:
+    """
+    Ленивая инициализация репозитория. Репозиторий создаётся один раз на процесс при первом запросе,
+        а не при импорте модуля. Поэтому WSGI-сервер с несколькими рабочими процессами не открывает подключения
+        к базе до fork(), а импорт модуля (например, командой flask) не требует доступа к базе
+    :return: инстанс репозитория, выбранного в файле настроек
+    """
+    global repo
+    if repo is None:
+        with repo_lock:
+            if repo is None:
+                repo = RepositoryCreator.create(factory)
+    return repo
+
+
+def create_app() -> Flask:
+    """
+    Фабрика приложения. Её находят и WSGI-серверы (например, gunicorn "app:create_app()"), и команда flask
+    :return: объект приложения, с которым сможет работать WSGI сервер
+    """
+    app = Flask(__name__)
+    app.config['SECRET_KEY'] = 'gh5ng843bh68hfi4nfc6h3ndh4xc53b56lk89gm4bf2gc6ehm'  # произвольная случайная длинная строка
+    app.url_map.strict_slashes = False  # /user/ обрабатывается как /user, без перенаправления; задаётся до регистрации
+    app.register_blueprint(bp)
+    app.cli.add_command(init_db_command)
+    return app
+
+
+@click.command("init-db")
+def init_db_command() -> None:
+    """
+    Создаёт структуру хранилища (для RepositoryMySQL - базу данных и таблицу users), если её ещё нет.
+    Существующие данные не удаляются. Запуск: FLASK_APP=app flask init-db
+    """
+    if get_repo().init_db() == -1:
+        raise click.ClickException("Failed to initialize the repository.")
+    click.echo("Initialized the repository.")
+
+
+def ojson(obj, status: int = 200):
+    """
+    Замена jsonify(): сериализует ответ при помощи orjson (C-расширение), что заметно быстрее стандартного json
+        на больших списках пользователей
+    :param obj: объект для сериализации (словарь или список словарей)
+    :param status: код ответа
+    :return: объект Response с json в теле ответа
+    """
+    return Response(orjson.dumps(obj), status=status, mimetype="application/json")
+
+
+def is_valid_title(title) -> bool:
+    """
+    Проверяет ФИО до записи в репозиторий, чтобы не отправлять в хранилище заведомо неверный запрос.
+    Наибольшая длина ФИО зависит от репозитория, см. AbstractRepository.title_fits()
+    :param title: значение ФИО из запроса
+    :return: True, если ФИО - непустая строка, которая помещается в репозиторий, иначе False
+    """
+    return isinstance(title, str) and title != "" and get_repo().title_fits(title)
+
+
+def read_json():
+    """
+    Замена request.get_json(silent=True): разбирает тело запроса при помощи orjson
+    :return: разобранный объект, либо None, если тело запроса не json или его не удалось разобрать
+    """
+    if not request.is_json:
+        return None
+    try:
+        return orjson.loads(request.get_data(cache=False))
+    except orjson.JSONDecodeError:
+        return None
+
+
+@bp.app_errorhandler(404)
+def not_found(error) -> (str, int):
+    """
+    Ответ на запрос к несуществующему ресурсу (например, /user/abc). Короткий текст вместо HTML-страницы Flask,
+        в том же формате, что и остальные отказы сервиса
+    :param error: исключение NotFound
+    """
+    return "Rejected. No such resource", 404
+
+
+@bp.app_errorhandler(RepositoryError)
+def repository_failure(error) -> (str, int):
+    """
+    Ответ на сбой хранилища при чтении (например, база данных недоступна): код 503, а не 404,
+        чтобы клиент мог отличить сбой от отсутствия пользователя и повторить запрос позже
+    :param error: исключение RepositoryError
+    """
+    return MSG_REPO_FAILURE, 503
 
 
-@app.route('/user/<int:user_id>', methods=['GET'])
 def get_user(user_id: int) -> (str, int):
     """
     Точка входа для запроса на получение записи пользователя по id. Пример запроса:
     curl http://localhost:80/user/2
     :param user_id: целочисленное значение id пользователя
     :return: если пользователь найден в базе, то возвращает json с данными пользователя и код 200,
-             иначе возвращает код 404
+             если не найден, то возвращает код 404, при сбое хранилища - код 503
              Формат возвращаемого значения: {"id": user_id, "title": title}
     """
-    entity = repo.get(user_id)
-    if entity == factory.empty_entity:
-        return "Rejected. No user with id=" + str(user_id), 404
-    return jsonify(entity.get_dict()), 200
+    entity = get_repo().get(user_id)
+    if entity is EMPTY:
+        return MSG_NO_USER % user_id, 404
+    return Response(entity.get_json(), mimetype="application/json")
 
 
-@app.route('/user', methods=['GET'])
 def get_users() -> (str, int):
     """
     Точка входа для запроса на получение записи пользователя по id. Пример запроса:
     curl http://localhost:80/users
     :return: если база не пуста, то возвращает json с данными пользователей и код 200,
-             иначе возвращает код 404
+             иначе возвращает код 404; если хранилище недоступно до начала ответа, то возвращает код 503.
+             Если хранилище откажет во время передачи списка, то исключение прервёт ответ: клиент получит
+             оборванный ответ, а не список, который выглядит полным
              Формат возвращаемого значения: [{"id": user_id1, "title": title1}, {"id": user_id2, "title": title2}]
     """
-    entities_list = repo.list()
-    if not entities_list:
+    rows = get_repo().iter_json()
+    first = next(rows, None)
+    if first is None:
         return "Rejected. DB is empty", 404
-    result = []
-    for entity in entities_list:
-        result.append(entity.get_dict())
-    return jsonify(result), 200
+
+    def generate():
+        """
+        Отдаёт json-список по частям, по мере чтения пользователей из репозитория,
+            не собирая весь список и весь json в памяти
+        """
+        yield b"[" + first
+        for row in rows:
+            yield b"," + row
+        yield b"]"
+
+    return Response(generate(), mimetype="application/json")
+
+
+@bp.route('/user/search', methods=['GET'])
+def search_users() -> (str, int):
+    """
+    Точка входа для запроса на поиск записей пользователей по ФИО. Пример запроса:
+    curl http://localhost:80/user/search?title=Mikhail%20Vasilevich%20Lomonosov
+    :аргумент запроса title: строковое значение ФИО пользователя, сравнивается на точное совпадение
+    :return: если аргумент title не передан, то возвращает код 400,
+             если пользователи найдены, то возвращает json с их данными и код 200, иначе возвращает код 404,
+             при сбое хранилища - код 503
+             Формат возвращаемого значения: [{"id": user_id1, "title": title}, {"id": user_id2, "title": title}]
+    """
+    title = request.args.get('title')
+    if title is None:
+        return "Rejected. No title to search", 400
+    entities = get_repo().find_by_title(title)
+    if not entities:
+        return MSG_NO_USERS_WITH_TITLE % title, 404
+    return ojson([entity.get_dict() for entity in entities])
 
 
-@app.route('/user/<int:user_id>', methods=['POST'])
 def add_user(user_id: int) -> (str, int):
     """
     Точка входа для запроса на добавление записи пользователя по id. Пример запроса:
     curl -X POST http://localhost:80/user/3?title=Mikhail%20Vasilevich%20Lomonosov
     :param user_id: целочисленное значение id пользователя
     :аргумент запроса title: строковое значение ФИО пользователя
-    :return: если пользователь существует в базе, то не создаёт пользователя и возвращает код 422,
-             иначе создаёт и возвращает код 204
+    :return: если ФИО не передано, пустое или не помещается в репозиторий, то возвращает код 400,
+             если id или ФИО не помещаются в хранилище, то возвращает код 400,
+             если пользователь существует в базе, то не создаёт пользователя и возвращает код 422,
+             при сбое хранилища возвращает код 503, иначе создаёт и возвращает код 204
     """
     title = request.args.get('title')
+    if not is_valid_title(title):
+        return MSG_WRONG_TITLE, 400
     entity = factory.create(user_id, {'title': title})
-    if repo.add(entity) == -1:
-        return "Rejected. User with id=" + str(user_id) + " already exists", 422
+    result = get_repo().add(entity)
+    if result == -3:
+        return MSG_NOT_STORABLE % user_id, 400
+    if result == -2:
+        return MSG_REPO_FAILURE, 503
+    if result == -1:
+        return MSG_USER_EXISTS % user_id, 422
     return 'Success. User created', 204
 
 
-@app.route('/user/<int:user_id>', methods=['DELETE'])
+def add_users() -> (str, int):
+    """
+    Точка входа для запроса на пакетное добавление записей пользователей. Пример запроса:
+    curl -X POST http://localhost:80/user -H "Content-Type: application/json"
+         -d '[{"id": 3, "title": "Mikhail Vasilevich Lomonosov"}, {"id": 4, "title": "Aleksandr Sergeevich Pushkin"}]'
+    :тело запроса: json со списком пользователей в формате [{"id": user_id1, "title": title1}, ...]
+    :return: если тело запроса имеет неверный формат, то возвращает код 400,
+             если id или ФИО хотя бы одного пользователя не помещаются в хранилище, то не создаёт ни одного
+             и возвращает код 400,
+             если хотя бы один из пользователей существует в базе, то не создаёт ни одного и возвращает код 422,
+             при сбое хранилища не создаёт ни одного и возвращает код 503,
+             иначе создаёт всех пользователей и возвращает код 204
+    """
+    users = read_json()
+    if not isinstance(users, list) or not users:
+        return "Rejected. Wrong users format", 400
+    entities = []
+    for user in users:
+        if not isinstance(user, dict) or not is_valid_title(user.get('title')):
+            return "Rejected. Wrong users format", 400
+        entity = factory.create(user.get('id'), {'title': user['title']})
+        if entity is EMPTY:
+            return "Rejected. Wrong users format", 400
+        entities.append(entity)
+    result = get_repo().add_many(entities)
+    if result == -3:
+        return "Rejected. Some of users can not be stored in the repository", 400
+    if result == -2:
+        return MSG_REPO_FAILURE, 503
+    if result == -1:
+        return "Rejected. Some of users already exist", 422
+    return 'Success. Users created', 204
+
+
 def del_user(user_id: int) -> (str, int):
     """
     Точка входа для запроса на удаление записи пользователя по id. Пример запроса:
     curl -X DELETE http://localhost:80/user/3
     :param user_id: целочисленное значение id пользователя
-    :return: если пользователь не существует в базе, то возвращает код 422,
-             иначе удаляет его и возвращает код 204
+    :return: если пользователь не существует в базе, то возвращает код 404,
+             при сбое хранилища возвращает код 503, иначе удаляет его и возвращает код 204
     """
-    if repo.delete(user_id) == -1:
-        return "Rejected. No user with id=" + str(user_id), 404
+    result = get_repo().delete(user_id)
+    if result == -2:
+        return MSG_REPO_FAILURE, 503
+    if result == -1:
+        return MSG_NO_USER % user_id, 404
     return 'Success. User deleted', 204
 
 
-@app.route('/user/<int:user_id>', methods=['PATCH'])
 def upd_user(user_id: int) -> (str, int):
     """
     Точка входа для запроса на изменение записи пользователя по id. Пример запроса:
     curl -X PATCH http://localhost:80/user/3?title=Aleksandr%20Sergeevich%20Pushkin
     :param user_id: целочисленное значение id пользователя
     :аргумент запроса title: строковое значение ФИО пользователя
-    :return: если пользователь не существует в базе, то возвращает код 422,
-             иначе изменяет его данные и возвращает код 204
+    :return: если ФИО не передано, пустое или не помещается в репозиторий, то возвращает код 400,
+             если пользователь не существует в базе, то возвращает код 404,
+             при сбое хранилища возвращает код 503, иначе изменяет его данные и возвращает код 204
     """
     title = request.args.get('title')
+    if not is_valid_title(title):
+        return MSG_WRONG_TITLE, 400
     entity = factory.create(user_id, {'title': title})
-    result = repo.update(entity)
+    result = get_repo().update(entity)
+    if result == -3:
+        return MSG_WRONG_TITLE, 400
+    if result == -2:
+        return MSG_REPO_FAILURE, 503
     if result == -1:
-        return "Rejected. No user with id=" + str(user_id), 404
+        return MSG_NO_USER % user_id, 404
     return 'Success. User updated', 204
 
 
+"""
+Точки входа /user и /user/<int:user_id> зарегистрированы по одному правилу на каждый путь, а не по правилу на метод:
+    Werkzeug находит правило за одно сопоставление пути, а обработчик выбирается по методу запроса из словаря.
+    HEAD обрабатывается так же, как GET
+"""
+USERS_VIEWS = {"GET": get_users, "HEAD": get_users, "POST": add_users}
+USER_VIEWS = {"GET": get_user, "HEAD": get_user, "POST": add_user, "DELETE": del_user, "PATCH": upd_user}
+
+
+def users_view() -> (str, int):
+    """
+    Выбирает обработчик запроса к ресурсу /user по методу запроса
+    """
+    return USERS_VIEWS[request.method]()
+
+
+def user_view(user_id: int) -> (str, int):
+    """
+    Выбирает обработчик запроса к ресурсу /user/<int:user_id> по методу запроса
+    :param user_id: целочисленное значение id пользователя
+    """
+    return USER_VIEWS[request.method](user_id)
+
+
+bp.add_url_rule('/user', view_func=users_view, methods=['GET', 'POST'])
+bp.add_url_rule('/user/<int:user_id>', view_func=user_view, methods=['GET', 'POST', 'DELETE', 'PATCH'])
+
+
 if __name__ == '__main__':
     """
     Тестовый запуск сервиса. Активируется только при непосредственном запуске приложения.
@@ -123,4 +334,4 @@ if __name__ == '__main__':
         result.append(entity.get_dict())
     print(result)"""
 
-    app.run(host="127.0.0.1", port=80)
+    create_app().run(host="127.0.0.1", port=80)
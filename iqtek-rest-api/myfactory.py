@@ -1,47 +1,10 @@
 from __future__ import annotations
 from abc import ABC, abstractmethod
 
-
-# Factory for entities start
-class TypeChecker:
-    """
-    Это дескриптор, проверяющий принадлежность значения переменной инстанса с именем name к типу value_type
-    """
-    def __init__(self, name, value_type):
-        self.name = name
-        self.value_type = value_type
-
-    def __set__(self, instance, value):
-        if isinstance(value, self.value_type):
-            instance.__dict__[self.name] = value
-        else:
-            raise TypeError(f"'{self.name}' {value} must be {self.value_type}")
-
-    def __get__(self, instance, class_):
-        return instance.__dict__[self.name]
-
-
-class DictChecker:
-    """
-    Это дескриптор, проверяющий принадлежность значения переменной инстанса с именем name к типу value_type
-    """
-    def __init__(self, dict_name, key_name):
-        self.dict_name = dict_name
-        self.key_name = key_name
-
-    def __set__(self, instance, dict_value):
-        if isinstance(dict_value, dict):
-            if self.key_name in dict_value:
-                instance.__dict__[self.dict_name] = dict_value
-            else:
-                raise TypeError(f"User init error. Key '{self.key_name}' must be in {self.dict_name} dictionary")
-        else:
-            raise TypeError(f"User init error. Given {self.dict_name} structure must be {dict}")
-
-    def __get__(self, instance, class_):
-        return instance.__dict__[self.dict_name]
+import orjson
 
 
+# Factory for entities start
 class Entity(ABC):
     """
     Абстрактная сущность, от которой будут наследоваться конкретные сущности, такие как User
@@ -49,11 +12,11 @@ class Entity(ABC):
     Определяет конструктор по умолчанию, в котором сохраняются id сущности и словарь её параметров
     Метод get_dict() должен возвращать словарь, в котором записаны все параметры сущности, включая и её id.
         Он нужен, чтобы возвращать представление сущности через jsonify()
-    Добавлена небольшая оптимизация при помощи __slots__. Расход памяти должен уменьшиться
+    Метод get_json() возвращает то же представление, уже сериализованное в json
+    Добавлена небольшая оптимизация при помощи __slots__: у сущностей нет __dict__, поэтому расход памяти меньше.
+        Наследники тоже должны объявлять __slots__, иначе __dict__ появится снова
     """
-    __slots__ = ['id', 'properties']
-    id_checker = TypeChecker("id", int)
-    properties_checker = TypeChecker("properties", dict)
+    __slots__ = ('id', 'properties')
 
     def __init__(self, entity_id: int, properties: dict) -> None:
         self.id = entity_id
@@ -63,25 +26,55 @@ class Entity(ABC):
     def get_dict(self) -> dict:
         raise NotImplementedError
 
+    def get_json(self) -> bytes:
+        return orjson.dumps(self.get_dict())
+
 
 class User(Entity):
     """
     Конкретный класс, реализующий абстракцию Entity. Предназначен для хранения id и ФИО пользователей в репозитории
+    Значения хранятся в слотах Entity и проверяются один раз в конструкторе: чтение id и properties
+        остаётся обычным обращением к слоту, без вызова Python-кода
+    Сущность не изменяется после создания: чтобы изменить пользователя, в репозиторий передаётся новая сущность.
+        Поэтому словарь для get_dict() строится один раз в конструкторе, а json для get_json() - при первом запросе
     """
-    id = TypeChecker("id", int)
-    properties = DictChecker("properties", "title")
+    __slots__ = ('_view', '_json')
 
     def __init__(self, user_id: int, properties: dict) -> None:
+        """
+        Проверяет параметры и создаёт сущность User
+        :param user_id: целочисленное значение id пользователя
+        :param properties: словарь параметров пользователя, обязательно содержащий ключ 'title'
+        :raises TypeError: если id не целое число, properties не словарь или в нём нет ключа 'title'.
+            bool - подкласс int, но True и False не принимаются в качестве id
+        """
+        if type(user_id) is not int:
+            raise TypeError(f"'id' {user_id} must be {int}")
+        if not isinstance(properties, dict):
+            raise TypeError(f"User init error. Given properties structure must be {dict}")
+        if "title" not in properties:
+            raise TypeError("User init error. Key 'title' must be in properties dictionary")
         super().__init__(user_id, properties)
+        self._view = {"id": self.id, **self.properties}
+        self._json = None
 
     def get_dict(self) -> dict:
         """
-        Преобразовывает параметры сущности User в вид, подходящий для функции jsonify()
+        Возвращает параметры сущности User в виде, подходящем для сериализации в json
+        Словарь общий для всех вызовов, поэтому изменять его нельзя
         :return: словарь с параметрами сущности User, включая и id
         """
-        result = {"id": self.id}
-        result.update(self.properties)
-        return result
+        return self._view
+
+    def get_json(self) -> bytes:
+        """
+        Возвращает параметры сущности User, сериализованные в json
+        Сериализация выполняется один раз: RepositoryRAM и кэш RepositoryMySQL многократно отдают одну и ту же сущность
+        :return: json с параметрами сущности User, включая и id, в виде bytes
+        """
+        if self._json is None:
+            self._json = orjson.dumps(self._view)
+        return self._json
 
 
 class AbstractFactory(ABC):
@@ -181,7 +174,7 @@ class UserFactory(AbstractFactory):
 
 if __name__ == "__main__":
     """
-    Небольшой тест дескрипторов TypeChecker и DictChecker
+    Небольшой тест проверки параметров в конструкторе User
     """
     factory = UserFactory()
     print("ID строковый вместо целочисленного")
@@ -190,6 +183,12 @@ if __name__ == "__main__":
     print(result)
     assert result == {'id': -1, 'title': ''}
 
+    print("\nID логический вместо целочисленного")
+    user = factory.create(True, {"title": "des"})
+    result = user.get_dict()
+    print(result)
+    assert result == {'id': -1, 'title': ''}
+
     print("\nПередан список свойств вместо словаря")
     user = factory.create(1, ["title", "des"])
     result = user.get_dict()
@@ -213,7 +212,11 @@ if __name__ == "__main__":
     """
 
     print("\nПопытка установки свойства инстанса, не входящего в __slots__. Не должно ничего измениться")
-    user.property = "sample-property"
+    try:
+        user.property = "sample-property"
+    except AttributeError as e:
+        print(e)
+    assert not hasattr(user, "__dict__")
     result = user.get_dict()
     print(result)
     assert result == {'id': 1, 'title': 'des'}
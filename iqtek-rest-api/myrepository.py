@@ -1,8 +1,13 @@
 from __future__ import annotations
 
-from mysql.connector import connect, Error
-import json  # to read options from file
+from mysql.connector import connect, DataError, Error, HAVE_CEXT, IntegrityError
+from mysql.connector.constants import ClientFlag
+from mysql.connector.pooling import MySQLConnectionPool
+from collections import OrderedDict  # for LRU cache
+from collections.abc import Iterator
+import orjson  # to read options from file and to serialize entities
 import sys  # for repository factory (it creates class by name (string))
+import threading  # for LRU cache and RepositoryRAM locks
 
 import time
 
@@ -34,17 +39,120 @@ def memoize(func):
     return wrapper
 
 
+class LRUCache:
+    """
+    Потокобезопасный кэш ограниченного размера. При переполнении вытесняет записи, которые дольше всего не читались
+    Каждое удаление записи увеличивает версию кэша и запоминает её как отметку об удалении этого ключа.
+        Читатель запоминает версию до запроса к базе и передаёт её в put(): если за время запроса запись
+        с этим ключом была изменена, то устаревший результат не сохраняется. Изменения других ключей
+        результат не отменяют, поэтому при постоянной записи в базу кэш по-прежнему заполняется
+    Отметок об удалении хранится не больше maxsize. Версия самой старой вытесненной отметки запоминается:
+        результат запроса, начатого раньше неё, не сохраняется, так как неизвестно, не изменялся ли его ключ
+    Запись живёт не дольше ttl секунд: изменения, сделанные другими процессами, этот кэш не удаляют,
+        поэтому устаревшая запись должна со временем уйти из кэша сама
+    """
+    def __init__(self, maxsize: int, ttl: float):
+        self.__maxsize = maxsize
+        self.__ttl = ttl
+        self.__data = OrderedDict()  # ключ -> (значение, момент устаревания по time.monotonic())
+        self.__lock = threading.Lock()
+        self.__version = 0
+        self.__popped = OrderedDict()  # ключ -> версия при последнем удалении этого ключа
+        self.__popped_floor = 0  # версия самой поздней из вытесненных отметок об удалении
+
+    @property
+    def version(self) -> int:
+        return self.__version
+
+    def get(self, key, default=None):
+        with self.__lock:
+            item = self.__data.get(key)
+            if item is None:
+                return default
+            value, expires_at = item
+            if time.monotonic() >= expires_at:
+                del self.__data[key]
+                return default
+            self.__data.move_to_end(key)
+            return value
+
+    def put(self, key, value, version: int) -> None:
+        with self.__lock:
+            if version < self.__popped_floor or self.__popped.get(key, 0) > version:
+                return
+            self.__data[key] = (value, time.monotonic() + self.__ttl)
+            self.__data.move_to_end(key)
+            if len(self.__data) > self.__maxsize:
+                self.__data.popitem(last=False)
+
+    def pop(self, key) -> None:
+        with self.__lock:
+            self.__data.pop(key, None)
+            self.__version += 1
+            self.__popped[key] = self.__version
+            self.__popped.move_to_end(key)
+            if len(self.__popped) > self.__maxsize:
+                _, self.__popped_floor = self.__popped.popitem(last=False)
+
+
+class RepositoryError(Exception):
+    """
+    Сбой хранилища (например, база данных недоступна). Бросается методами чтения репозитория,
+        чтобы сбой не выглядел как отсутствие сущности: точки входа отвечают на него кодом 503, а не 404
+    """
+
+
+def socket_is_patched() -> bool:
+    """
+    Проверяет, заменён ли модуль socket кооперативной реализацией gevent (gunicorn -k gevent, monkey.patch_all())
+    :return: True, если socket заменён, иначе False
+    """
+    monkey = sys.modules.get("gevent.monkey")
+    return monkey is not None and monkey.is_module_patched("socket")
+
+
+def use_pure_driver() -> bool:
+    """
+    Выбирает реализацию драйвера MySQL. C-расширение разбирает протокол MySQL быстрее; чистый Python - если его нет
+        или если запущен gevent: ввод-вывод C-расширения блокирует весь процесс, а не переключает greenlet
+    Вызывается при создании подключений, а не один раз при импорте модуля: рабочий процесс gevent заменяет socket
+        после своего запуска, и модуль к этому моменту может быть уже импортирован
+    :return: True, если нужна реализация на чистом Python, иначе False
+    """
+    return not HAVE_CEXT or socket_is_patched()
+
+
 OPTIONS_FILE_PATH = "options.json"
 DB_NAME = "sample_database"
+POOL_NAME = "users"
+POOL_SIZE = 10  # размер пула по умолчанию; переопределяется параметром pool_size в файле настроек
+POOL_SIZE_MAX = 32  # ограничение mysql.connector на размер пула
+POOL_TIMEOUT = 5  # сколько секунд ждать свободного подключения, если все подключения пула заняты
+POOL_RETRY = 1  # не чаще чем раз в столько секунд повторять создание пула, если база была недоступна
+BATCH_SIZE = 50  # количество строк в одном многострочном INSERT при пакетном добавлении
+CACHE_SIZE = 4096  # количество сущностей в кэше RepositoryMySQL
+CACHE_TTL = 60  # сколько секунд сущность живёт в кэше RepositoryMySQL; столько же видны чужие изменения в базе
+FETCH_SIZE = 1000  # количество строк в одной странице, читаемой из базы при потоковой выдаче списка
 
 
 # Repository start
 class AbstractRepository(ABC):
     """
     Абстрактный репозиторий для работы с сущностями Entity
-    Предполагает реализацию методов get(), list(), add(), delete(), update()
+    Предполагает реализацию методов get(), list(), add(), add_many(), delete(), update()
+    Метод iter_dicts() реализован через list(), но может быть переопределён для потоковой выдачи данных
+    Метод iter_json() реализован через iter_dicts(), но может быть переопределён, чтобы отдавать готовый json
+    Метод find_by_title() реализован перебором list(), но может быть переопределён для поиска по индексу
+    Метод init_db() по умолчанию ничего не делает; переопределяется репозиториями, которым нужна структура хранилища
+    Метод title_fits() проверяет, помещается ли ФИО в хранилище; переопределяется репозиториями с иным ограничением
+    Метод id_fits() проверяет, помещается ли id в хранилище; по умолчанию подходит любой id
+    Методы записи возвращают 0 при успехе, -1, если сущность существует (add) или не существует (delete, update),
+        -2 при сбое хранилища и -3, если значения сущности не помещаются в хранилище (add, add_many, update).
+        Методы чтения при сбое хранилища бросают RepositoryError
     """
 
+    title_max_length = 255  # наибольшая длина ФИО в символах, как у столбца title VARCHAR(255) в RepositoryMySQL
+
     @abstractmethod
     def get(self, reference) -> Entity:
         raise NotImplementedError
@@ -57,6 +165,10 @@ class AbstractRepository(ABC):
     def add(self, entity: Entity) -> int:
         raise NotImplementedError
 
+    @abstractmethod
+    def add_many(self, entities: list[Entity]) -> int:
+        raise NotImplementedError
+
     @abstractmethod
     def delete(self, reference) -> int:
         raise NotImplementedError
@@ -65,13 +177,61 @@ class AbstractRepository(ABC):
     def update(self, reference) -> int:
         raise NotImplementedError
 
+    def iter_dicts(self) -> Iterator[dict]:
+        """
+        Перебирает все сущности репозитория в виде словарей, пригодных для сериализации в json
+        :return: итератор по словарям с параметрами сущностей, включая и id
+        """
+        for entity in self.list():
+            yield entity.get_dict()
+
+    def iter_json(self) -> Iterator[bytes]:
+        """
+        Перебирает все сущности репозитория в виде json, сериализуя словари из iter_dicts()
+        :return: итератор по json с параметрами сущностей, включая и id, в виде bytes
+        """
+        for row in self.iter_dicts():
+            yield orjson.dumps(row)
+
+    def find_by_title(self, title: str) -> list[Entity]:
+        """
+        Ищет сущности с заданным ФИО перебором всех сущностей репозитория
+        :param title: строковое значение ФИО, сравнивается на точное совпадение
+        :return: список найденных сущностей, упорядоченный по id, или [], если таких нет
+        """
+        return sorted((entity for entity in self.list() if entity.properties["title"] == title),
+                      key=lambda entity: entity.id)
+
+    def title_fits(self, title: str) -> bool:
+        """
+        Проверяет, помещается ли ФИО в хранилище
+        :param title: строковое значение ФИО
+        :return: True, если длина ФИО не больше title_max_length символов, иначе False
+        """
+        return len(title) <= self.title_max_length
+
+    def id_fits(self, user_id: int) -> bool:
+        """
+        Проверяет, помещается ли id в хранилище
+        :param user_id: целочисленное значение id
+        :return: возвращает True: хранилище по умолчанию принимает любой id
+        """
+        return True
+
+    def init_db(self) -> int:
+        """
+        Создаёт структуру хранилища, если её ещё нет. Вызывается командой flask init-db, а не при каждом запуске
+        :return: возвращает 0
+        """
+        return 0
+
 
 class RepositoryBytearray(AbstractRepository):
     """
     Это конкретная реализация репозитория для хранения сущностей Entity в массиве байтов.
-    Работает быстрее, чем repositoryRAM, так как сложность чтения О(1)
+    Сложность чтения О(1), как и у RepositoryRAM, но записи хранятся компактно, без объектов Entity
     Но есть ограничения:
-        фиксированная длина записи
+        фиксированная длина записи: ФИО не длиннее __title_length байт в кодировке UTF-8, см. title_fits()
         сложнее удалять записи из репозитория
     Он может быть создан при помощи RepositoryCreator в качестве одного из возможных вариантов.
     """
@@ -89,6 +249,7 @@ class RepositoryBytearray(AbstractRepository):
         """
         self.__options = options  # Сохраняются параметры, переданные в конструктор
         self.__factory = fact  # Сохраняется фабрика сущностей
+        self.__empty_entity = fact.empty_entity  # Пустая сущность, которую возвращает get(), если сущности нет
         self.__db = bytearray(self.__title_length * self.__db_length)  # Инициализируется база пользователей.
 
     def __get_address(self, user_id: int) -> tuple[int, int]:
@@ -101,6 +262,39 @@ class RepositoryBytearray(AbstractRepository):
         last_byte = first_byte + self.__entry_length
         return first_byte, last_byte
 
+    def id_fits(self, user_id: int) -> bool:
+        """
+        Проверяет, что для id есть место в репозитории.
+        Без проверки id вне диапазона дал бы адрес за пределами массива (IndexError) или,
+            для id <= 0, отрицательный адрес, то есть запись в чужую ячейку с конца массива
+        :param user_id: целочисленное значение id сущности
+        :return: True, если 1 <= user_id <= __db_length, иначе False
+        """
+        return 1 <= user_id <= self.__db_length
+
+    def __to_entry(self, title: str) -> bytes:
+        """
+        Вспомогательная функция. Кодирует ФИО в содержимое ячейки: байты UTF-8, дополненные нулями до длины ячейки.
+        Ячейка записывается целиком, поэтому от прежнего, более длинного ФИО не остаётся хвоста
+        :param title: строковое значение ФИО
+        :return: содержимое ячейки длиной __entry_length байт
+        :raises ValueError: если ФИО не помещается в ячейку (см. title_fits()); точки входа проверяют это заранее
+        """
+        if not self.title_fits(title):
+            raise ValueError(f"Title does not fit into {self.__title_length} bytes")
+        return title.encode("utf-8").ljust(self.__entry_length, b"\x00")
+
+    def title_fits(self, title: str) -> bool:
+        """
+        Проверяет, помещается ли ФИО в ячейку репозитория. Длина ячейки ограничена в байтах, а не в символах:
+            ФИО на кириллице занимает по два байта на букву.
+        Нулевой символ в ФИО не допускается: нулями заполнена свободная часть ячейки, а нулевой первый байт
+            означает пустую ячейку
+        :param title: строковое значение ФИО
+        :return: True, если ФИО в кодировке UTF-8 не длиннее __title_length байт и без нулевых символов, иначе False
+        """
+        return "\x00" not in title and len(title.encode("utf-8")) <= self.__title_length
+
     @measure_time
     def get(self, user_id: int) -> Entity:
         """
@@ -109,11 +303,13 @@ class RepositoryBytearray(AbstractRepository):
         :return: если сущность найдена в репозитории, то возвращает сущность,
             иначе возвращает пустую сущность
         """
+        if not self.id_fits(user_id):
+            return self.__empty_entity
         first_byte, last_byte = self.__get_address(user_id)
         if self.__db[first_byte] != 0:
             response = self.__db[first_byte:last_byte].rstrip(b"\x00").decode("utf-8")
             return self.__factory.create(user_id, {"title": response})
-        return self.__factory.empty_entity
+        return self.__empty_entity
 
     @measure_time
     def list(self) -> list[Entity]:
@@ -122,32 +318,66 @@ class RepositoryBytearray(AbstractRepository):
         :return: если репозиторий не пустой, то возвращает список c сущностями из него, иначе возвращает []
         """
         results = []
-        for i in range(self.__db_length):
+        for i in range(1, self.__db_length + 1):  # id нумеруются с 1, см. __get_address()
             first_byte, last_byte = self.__get_address(i)
             if self.__db[first_byte] != 0:
                 response = self.__db[first_byte:last_byte].rstrip(b"\x00").decode("utf-8")
                 results.append(self.__factory.create(i, {"title": response}))
+        return results
 
-        if len(results) != 0:
-            return results
-        return []
+    def iter_dicts(self) -> Iterator[dict]:
+        """
+        Перебирает все сущности репозитория в виде словарей, минуя создание сущностей.
+        Перебор идёт по снимку массива байтов, поэтому изменения репозитория во время перебора на него не влияют
+        :return: итератор по словарям вида {"id": user_id, "title": title}
+        """
+        snapshot = bytes(self.__db)
+        for i in range(1, self.__db_length + 1):
+            first_byte, last_byte = self.__get_address(i)
+            if snapshot[first_byte] != 0:
+                yield {"id": i, "title": snapshot[first_byte:last_byte].rstrip(b"\x00").decode("utf-8")}
 
     @measure_time
     def add(self, entity: Entity) -> int:
         """
         Добавляет новую сущность в репозиторий
         :param entity: сущность с заполненными параметрами
-        :return: если сущность с таким id не существует, то возвращает 0, иначе возвращает -1
+        :return: если сущность с таким id не существует, то возвращает 0, иначе возвращает -1.
+            Для id вне диапазона 1..__db_length возвращает -3
         """
+        if not self.id_fits(entity.id):
+            return -3
         first_byte, last_byte = self.__get_address(entity.id)
-        title = entity.properties["title"]
-        to_db = bytearray(title, 'utf-8')
+        to_db = self.__to_entry(entity.properties["title"])
         if self.__db[first_byte] == 0:
-            for i in range(len(to_db)):
-                self.__db[first_byte + i] = to_db[i]
+            self.__db[first_byte:last_byte] = to_db
             return 0
         return -1
 
+    @measure_time
+    def add_many(self, entities: list[Entity]) -> int:
+        """
+        Добавляет в репозиторий сразу несколько новых сущностей
+        :param entities: список сущностей с заполненными параметрами
+        :return: если ни одна из сущностей не существует в репозитории и их id не повторяются,
+            то добавляет все сущности и возвращает 0, иначе не добавляет ни одной и возвращает -1.
+            Если id хотя бы одной сущности вне диапазона 1..__db_length, то не добавляет ни одной и возвращает -3
+        """
+        ids = {entity.id for entity in entities}
+        if not all(self.id_fits(user_id) for user_id in ids):
+            return -3
+        if len(ids) != len(entities):
+            return -1
+        for user_id in ids:
+            first_byte, last_byte = self.__get_address(user_id)
+            if self.__db[first_byte] != 0:
+                return -1
+        entries = [(entity.id, self.__to_entry(entity.properties["title"])) for entity in entities]
+        for user_id, to_db in entries:
+            first_byte, last_byte = self.__get_address(user_id)
+            self.__db[first_byte:last_byte] = to_db
+        return 0
+
     @measure_time
     def delete(self, user_id: int) -> int:
         """
@@ -155,6 +385,8 @@ class RepositoryBytearray(AbstractRepository):
         :param user_id: целочисленное значение id пользователя
         :return: если сущность с таким id существует на момент удаления, то возвращает 0, иначе возвращает -1
         """
+        if not self.id_fits(user_id):
+            return -1
         first_byte, last_byte = self.__get_address(user_id)
         if self.__db[first_byte] != 0:
             for i in range(self.__entry_length):
@@ -169,12 +401,12 @@ class RepositoryBytearray(AbstractRepository):
         :param entity: сущность с заполненными параметрами
         :return: если сущность с таким id существует, то возвращает 0, иначе возвращает -1
         """
+        if not self.id_fits(entity.id):
+            return -1
         first_byte, last_byte = self.__get_address(entity.id)
-        title = entity.properties["title"]
-        to_db = bytearray(title, 'utf-8')
+        to_db = self.__to_entry(entity.properties["title"])
         if self.__db[first_byte] != 0:
-            for i in range(len(to_db)):
-                self.__db[first_byte + i] = to_db[i]
+            self.__db[first_byte:last_byte] = to_db
             return 0
         return -1
 
@@ -189,25 +421,41 @@ class RepositoryRAM(AbstractRepository):
     def __init__(self, options: dict, fact: AbstractFactory):
         """
         Простая инициализация
-        Формат репозитория: список сущностей Entity
+        Формат репозитория: словарь сущностей Entity, ключом служит id сущности.
+            Поэтому поиск, добавление, изменение и удаление сущности по id выполняются за O(1)
+        Дополнительно хранится индекс по ФИО: словарь, ключом которого служит ФИО, а значением - множество id.
+            Поэтому поиск по ФИО выполняется за O(1) плюс размер ответа
+        Словарь сущностей и индекс изменяются несколькими шагами, поэтому все изменения и чтение индекса
+            выполняются под одной блокировкой: иначе при работе в потоках (gunicorn --threads, app.run())
+            поиск мог бы увидеть id, уже удалённый из словаря, или id под чужим ФИО
         :param options: словарь параметров. В данном контроллере не используется. Нет необходимости
         :param fact: фабрика. Используется при необходимости создать сущность Entity, возвращаемую из репозитория
         """
         self.__options = options  # Сохраняются параметры, переданные в конструктор
         self.__factory = fact  # Сохраняется фабрика сущностей
-        self.__db = []  # Инициализируется база пользователей.
+        self.__empty_entity = fact.empty_entity  # Пустая сущность, которую возвращает get(), если сущности нет
+        self.__db = {}  # Инициализируется база пользователей.
+        self.__by_title = {}  # Инициализируется индекс по ФИО
+        self.__lock = threading.Lock()  # Защищает согласованность словаря сущностей и индекса по ФИО
 
-    def __get_index(self, user_id: int) -> int:
+    def __index(self, entity: Entity) -> None:
         """
-        Вспомогательная процедура для поиска индекса записи в репозитории по известному id.
-        Нужна, так как репозиторий реализован в виде списка
-        :param user_id: целочисленное значение id сущности
-        :return: если сущность с таким id существует, то возвращает индекс, иначе возвращает -1
+        Вспомогательная процедура. Добавляет id сущности в индекс по ФИО
+        :param entity: сущность с заполненными параметрами
         """
-        for i in range(len(self.__db)):
-            if self.__db[i].id == user_id:
-                return i
-        return -1
+        self.__by_title.setdefault(entity.properties["title"], set()).add(entity.id)
+
+    def __unindex(self, entity: Entity) -> None:
+        """
+        Вспомогательная процедура. Удаляет id сущности из индекса по ФИО; пустые множества удаляются из индекса
+        :param entity: сущность с заполненными параметрами
+        """
+        title = entity.properties["title"]
+        ids = self.__by_title.get(title)
+        if ids is not None:
+            ids.discard(entity.id)
+            if not ids:
+                del self.__by_title[title]
 
     @measure_time
     def get(self, user_id: int) -> Entity:
@@ -217,10 +465,7 @@ class RepositoryRAM(AbstractRepository):
         :return: если сущность найдена в репозитории, то возвращает сущность,
             иначе возвращает пустую сущность
         """
-        for entity in self.__db:
-            if entity.id == user_id:
-                return entity
-        return self.__factory.empty_entity
+        return self.__db.get(user_id, self.__empty_entity)
 
     @measure_time
     def list(self) -> list[Entity]:
@@ -228,10 +473,18 @@ class RepositoryRAM(AbstractRepository):
         Возвращает все сущности из репозитория
         :return: если репозиторий не пустой, то возвращает список c сущностями из него, иначе возвращает []
         """
-        results = self.__db
-        if len(results) != 0:
-            return results
-        return []
+        return list(self.__db.values())
+
+    def iter_json(self) -> Iterator[bytes]:
+        """
+        Перебирает все сущности репозитория в виде json без повторной сериализации:
+            сущность хранит свой json после первого get_json(), поэтому каждая сущность сериализуется один раз,
+            а не при каждом запросе всех пользователей
+        Перебор идёт по снимку списка сущностей, поэтому изменения репозитория во время перебора на него не влияют
+        :return: итератор по json вида {"id": user_id, "title": title} в виде bytes
+        """
+        for entity in list(self.__db.values()):
+            yield entity.get_json()
 
     @measure_time
     def add(self, entity: Entity) -> int:
@@ -240,10 +493,31 @@ class RepositoryRAM(AbstractRepository):
         :param entity: сущность с заполненными параметрами
         :return: если сущность с таким id не существует, то возвращает 0, иначе возвращает -1
         """
-        if self.__get_index(entity.id) == -1:
-            self.__db.append(entity)
-            return 0
-        return -1
+        with self.__lock:
+            if entity.id in self.__db:
+                return -1
+            self.__db[entity.id] = entity
+            self.__index(entity)
+        return 0
+
+    @measure_time
+    def add_many(self, entities: list[Entity]) -> int:
+        """
+        Добавляет в репозиторий сразу несколько новых сущностей
+        :param entities: список сущностей с заполненными параметрами
+        :return: если ни одна из сущностей не существует в репозитории и их id не повторяются,
+            то добавляет все сущности и возвращает 0, иначе не добавляет ни одной и возвращает -1
+        """
+        new_entities = {entity.id: entity for entity in entities}
+        if len(new_entities) != len(entities):
+            return -1
+        with self.__lock:
+            if not self.__db.keys().isdisjoint(new_entities):
+                return -1
+            self.__db.update(new_entities)
+            for entity in entities:
+                self.__index(entity)
+        return 0
 
     @measure_time
     def delete(self, user_id: int) -> int:
@@ -252,11 +526,12 @@ class RepositoryRAM(AbstractRepository):
         :param user_id: целочисленное значение id пользователя
         :return: если сущность с таким id существует на момент удаления, то возвращает 0, иначе возвращает -1
         """
-        i = self.__get_index(user_id)
-        if i != -1:
-            del self.__db[i]
-            return 0
-        return -1
+        with self.__lock:
+            entity = self.__db.pop(user_id, None)
+            if entity is None:
+                return -1
+            self.__unindex(entity)
+        return 0
 
     @measure_time
     def update(self, entity: Entity) -> int:
@@ -265,11 +540,24 @@ class RepositoryRAM(AbstractRepository):
         :param entity: сущность с заполненными параметрами
         :return: если сущность с таким id существует, то возвращает 0, иначе возвращает -1
         """
-        i = self.__get_index(entity.id)
-        if i != -1:
-            self.__db[i] = entity
-            return 0
-        return -1
+        with self.__lock:
+            old_entity = self.__db.get(entity.id)
+            if old_entity is None:
+                return -1
+            self.__unindex(old_entity)
+            self.__db[entity.id] = entity
+            self.__index(entity)
+        return 0
+
+    @measure_time
+    def find_by_title(self, title: str) -> list[Entity]:
+        """
+        Ищет сущности с заданным ФИО по индексу, без перебора всего репозитория
+        :param title: строковое значение ФИО, сравнивается на точное совпадение
+        :return: список найденных сущностей, упорядоченный по id, или [], если таких нет
+        """
+        with self.__lock:
+            return [self.__db[user_id] for user_id in sorted(self.__by_title.get(title, ()))]
 
 
 class RepositoryMySQL(AbstractRepository):
@@ -278,159 +566,462 @@ class RepositoryMySQL(AbstractRepository):
     Используется доступ по логину и паролю
     Класс может быть создан при помощи фабрики RepositoryCreator в качестве одного из дух возможных вариантов.
     Другая возможность - использовать репозиторий RepositoryRAM.
+    Тексты запросов заданы один раз на уровне класса; параметры в них передаются позиционно (%s)
     """
+    __sql_select_one = "SELECT id, title FROM users WHERE id = %s"
+    __sql_select_all = "SELECT id, title FROM users"
+    __sql_select_page = "SELECT id, title FROM users WHERE id > %s ORDER BY id LIMIT %s"
+    __id_min, __id_max = -2 ** 31, 2 ** 31 - 1  # диапазон значений столбца id INT
+    __id_before_first = __id_min - 1  # меньше наименьшего значения столбца id; с него начинается первая страница
+    # Первое условие находит строки по индексу idx_title с правилами сравнения столбца (без учёта регистра),
+    #   второе оставляет только точные совпадения, как в RepositoryRAM и RepositoryBytearray.
+    #   Во втором условии сравниваются байты UTF-8, поэтому оно не зависит от кодировки столбца
+    __sql_select_by_title = ("SELECT id, title FROM users WHERE title = %s "
+                             "AND CAST(CONVERT(title USING utf8mb4) AS BINARY) = CAST(%s AS BINARY) ORDER BY id")
+    __sql_insert_one = "INSERT INTO users (id, title) VALUES (%s, %s)"
+    __sql_delete_one = "DELETE FROM users WHERE id = %s"
+    __sql_update_one = "UPDATE users SET title = %s WHERE id = %s"
+    __sql_select_table_format = ("SELECT t.row_format, c.character_set_name FROM information_schema.tables t "
+                                 "JOIN information_schema.columns c "
+                                 "ON c.table_schema = t.table_schema AND c.table_name = t.table_name "
+                                 "WHERE t.table_schema = %s AND t.table_name = 'users' AND c.column_name = 'title'")
+    __sql_count_title_index = ("SELECT COUNT(*) FROM information_schema.statistics "
+                               "WHERE table_schema = %s AND table_name = 'users' AND index_name = 'idx_title'")
 
     def __init__(self, options: dict, fact: AbstractFactory):
         """
         Простая инициализация
-        :param options: словарь параметров. Для данного репозитория используются параметры username, password
+        :param options: словарь параметров. Для данного репозитория используются параметры username, password, pool_size
         :param fact: фабрика сущностей. Используется при необходимости создать сущность, возвращаемую из репозитория
         """
         self.__options = options  # Сохранить настройки
-        self.__init_db()  # Инициализировать базу данных
+        self.__pool_lock = threading.Lock()  # Защищает повторное создание пула от одновременных запросов
+        self.__pool_retry_at = 0.0  # Момент (time.monotonic()), раньше которого пул не пересоздаётся
+        self.__pool_slots = threading.BoundedSemaphore(options["pool_size"])  # Свободные подключения пула
+        self.__pool = self.__create_pool()  # Создать пул подключений к базе данных
         self.__factory = fact  # Сохранить фабрику сущностей
-        self._cache = {}  # Инициализировать простой кэш
+        self.__empty_entity = fact.empty_entity  # Сохранить пустую сущность, которую возвращает get()
+        self._cache = LRUCache(CACHE_SIZE, CACHE_TTL)  # Инициализировать кэш сущностей по id
 
-    def __get_db_connection(self) -> connect:
+    def __create_pool(self) -> MySQLConnectionPool:
         """
-        Вспомогательная процедура для создания подключения к базе данных, расположенной на локальном компьютере.
+        Вспомогательная процедура для создания пула подключений к базе данных, расположенной на локальном компьютере.
+        Пул создаётся один раз при инициализации репозитория, чтобы не устанавливать TCP-соединение
+            и не проходить авторизацию при каждом запросе к базе.
         В качестве параметров использует логин и пароль, хранимые в словаре __options.
         В качестве имени базы использует значение глобальной константы DB_NAME
-        :return: если подключение к базе успешно, то возвращает объект mysql.connector.connect, иначе возвращает None
+        Подключения работают в режиме autocommit: каждый запрос - отдельная транзакция. Запросы на чтение
+            не открывают транзакцию, а запросы на изменение не требуют отдельного COMMIT.
+            Несколько запросов объединяются в транзакцию явно, см. add_many()
+        Если установлено C-расширение mysql-connector-python, то подключения используют его, см. use_pure_driver()
+        :return: если подключение к базе успешно, то возвращает объект MySQLConnectionPool, иначе возвращает None
         """
         try:
-            return connect(
+            return MySQLConnectionPool(
+                pool_name=POOL_NAME,
+                pool_size=self.__options["pool_size"],
                 host="localhost",
                 user=self.__options["username"],
                 password=self.__options["password"],
-                database=DB_NAME)
+                database=DB_NAME,
+                use_pure=use_pure_driver(),
+                autocommit=True,  # одиночный запрос фиксируется сервером сам, без отдельного COMMIT
+                client_flags=[ClientFlag.FOUND_ROWS])  # rowcount у UPDATE - найденные, а не изменённые строки
         except Error as err:
             print(err)
+            self.__pool_retry_at = time.monotonic() + POOL_RETRY
+            return None
+
+    def __ensure_pool(self) -> MySQLConnectionPool:
+        """
+        Вспомогательная процедура. Возвращает пул подключений; если его не удалось создать раньше
+            (например, сервис запущен раньше, чем база), то повторяет попытку, но не чаще раза в POOL_RETRY секунд,
+            чтобы запросы к недоступной базе не устанавливали каждый раз новые соединения
+        :return: объект MySQLConnectionPool, либо None, если база по-прежнему недоступна
+        """
+        if self.__pool is None and time.monotonic() >= self.__pool_retry_at:
+            with self.__pool_lock:
+                if self.__pool is None and time.monotonic() >= self.__pool_retry_at:
+                    self.__pool = self.__create_pool()
+        return self.__pool
+
+    def __get_db_connection(self) -> connect:
+        """
+        Вспомогательная процедура для получения подключения к базе данных из пула.
+        Полученное подключение возвращается в пул процедурой __release_db_connection()
+        Сам пул бросает PoolError сразу, если все подключения заняты. Поэтому число выданных подключений
+            ограничивается семафором размером с пул: если все подключения заняты запросами из других потоков,
+            то запрос засыпает на семафоре и просыпается, когда подключение возвращают в пул,
+            но ждёт не дольше POOL_TIMEOUT секунд. Ожидающие запросы не опрашивают пул в цикле
+        :return: если подключение к базе успешно, то возвращает объект PooledMySQLConnection, иначе возвращает None
+        """
+        pool = self.__ensure_pool()
+        if pool is None:
+            return None
+        if not self.__pool_slots.acquire(timeout=POOL_TIMEOUT):
+            print(f"No free connection in the pool for {POOL_TIMEOUT} seconds")
+            return None
+        try:
+            return pool.get_connection()
+        except Error as err:  # в том числе PoolError
+            print(err)
+            self.__pool_slots.release()
             return None
 
-    def __make_query(self, query: str, user_id=0, title="") -> list:
+    def __release_db_connection(self, conn) -> None:
+        """
+        Вспомогательная процедура. Возвращает подключение в пул (close() у подключения пула не закрывает его)
+            и освобождает место в семафоре, будя запрос, который ждёт подключения дольше других
+        :param conn: подключение, полученное от __get_db_connection()
+        """
+        try:
+            conn.close()
+        finally:
+            self.__pool_slots.release()
+
+    def __make_query(self, query: str, params=()) -> list:
         """
-        Вспомогательная процедура для создания запросов к базе данных
-        Использует передачу именованных параметров для противостояния атакам SQL injection
+        Вспомогательная процедура для запросов к базе данных на чтение (SELECT).
+        Подключения пула работают в режиме autocommit, поэтому запрос не открывает транзакцию и не требует COMMIT
+        Использует передачу параметров отдельно от текста запроса для противостояния атакам SQL injection
         Если при вызове передан небезопасный запрос, то исключения не возникает
         :param query: строка запроса к базе, отформатированная в соответствии со стандартами MySQL
-        :param user_id: целочисленное значение id сущности для передачи в качестве параметра в запрос
-        :param title: строковое значение заголовка сущности для передачи в качестве параметра в запрос
-        :return: возвращает ответ от базы данных.
-        Это может быть список словарей с параметрами сущностей в случае запроса SELECT,
-            либо пустая строка в других случаях
-        Если запрос к базе возвращает исключение, то данная процедура возвращает []
+        :param params: кортеж значений для позиционных параметров %s запроса
+        :return: возвращает ответ от базы данных: список кортежей значений столбцов в порядке, указанном в запросе.
+            Курсор не строит словарь для каждой строки: столбцы запросов известны заранее (id, title),
+            и вызывающий метод сразу распаковывает кортеж в сущность
+        :raises RepositoryError: если база недоступна или запрос к базе возвращает исключение.
+            Так сбой не смешивается с пустым результатом и не попадает в кэш
+        Подключение возвращается в пул и при исключении, поэтому сбойные запросы не исчерпывают пул
         """
+        conn = self.__get_db_connection()  # Получить подключение из пула
+        if conn is None:
+            raise RepositoryError("No connection to the database")
         try:
-            conn = self.__get_db_connection()  # Создать подключение
-            with conn.cursor(dictionary=True) as cursor:  # параметр dictionary указывает, что курсор возвращает словари
-                cursor.execute(query, {'user_id': user_id, 'title': title})  # выполнить запрос безопасным образом
-                results = cursor.fetchall()  # получить результаты выполнения
-                cursor.close()  # вручную закрыть курсор
-            conn.commit()  # вручную указать, что транзакции завершены
-            conn.close()  # вручную закрыть соединение
+            with conn.cursor() as cursor:
+                cursor.execute(query, params)  # выполнить запрос безопасным образом
+                results = cursor.fetchall() if cursor.with_rows else []  # получить результаты выполнения
             return results
         except Error as err:
             print(f"Error with db: {err}")
-            return []
-
-    def __init_db(self) -> int:
-        """
-        Инициализация базы данных
-        :return: возвращает всегда 0, так как исключения обрабатываются в вызываемой процедуре __make_query()
-        """
-        self.__make_query(
-            f"CREATE DATABASE IF NOT EXISTS {DB_NAME};")  # создать базу с именем DB_NAME, если не существует
-        self.__make_query("DROP TABLE IF EXISTS users;")  # удаляем таблицу из предыдущих запусков
-        # далее создать таблицу.
-        #   id: целочисленное без автоматического инкремента
-        #   title: строковое с максимальной длинной 255
-        self.__make_query("""CREATE TABLE IF NOT EXISTS users (
-                           id INT PRIMARY KEY,
-                           title VARCHAR(255) NOT NULL);""")
-        return 0
+            raise RepositoryError(str(err)) from err
+        finally:
+            self.__release_db_connection(conn)  # вернуть соединение в пул
+
+    def __make_write(self, query: str, params=()) -> int:
+        """
+        Вспомогательная процедура для запросов к базе данных, изменяющих записи (INSERT, UPDATE, DELETE).
+        В отличие от __make_query() возвращает количество затронутых строк. По нему вызывающий метод узнаёт,
+            существовала ли запись, и ему не нужно делать перед изменением отдельный запрос SELECT
+        Использует передачу параметров отдельно от текста запроса для противостояния атакам SQL injection
+        :param query: строка запроса к базе, отформатированная в соответствии со стандартами MySQL
+        :param params: кортеж значений для позиционных параметров %s запроса
+        :return: количество затронутых запросом строк.
+        Если запрос нарушает уникальность первичного ключа, то возвращает 0,
+            если значения не помещаются в столбцы таблицы, то возвращает -3,
+            если база недоступна или запрос возвращает другое исключение, то возвращает -2
+        """
+        conn = self.__get_db_connection()  # Получить подключение из пула
+        if conn is None:
+            return -2
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute(query, params)  # выполнить запрос безопасным образом; autocommit фиксирует его сам
+                rowcount = cursor.rowcount
+            return rowcount
+        except IntegrityError:
+            return 0  # запись с таким id уже существует
+        except DataError:
+            return -3  # значение вне диапазона или длиннее столбца; повторять такой запрос бесполезно
+        except Error as err:
+            print(f"Error with db: {err}")
+            return -2
+        finally:
+            self.__release_db_connection(conn)  # вернуть соединение в пул
+
+    def __connect_directly(self):
+        """
+        Вспомогательная процедура. Устанавливает подключение к серверу напрямую, а не берёт его из пула:
+            пул подключается к базе DB_NAME, которой до инициализации может ещё не существовать.
+        Используется при инициализации базы данных
+        :return: подключение к серверу или None, если сервер недоступен
+        """
+        try:
+            return connect(
+                host="localhost",
+                user=self.__options["username"],
+                password=self.__options["password"],
+                use_pure=use_pure_driver())
+        except Error as err:
+            print(f"Error with db: {err}")
+            return None
+
+    def __make_queries(self, queries: list[str]) -> int:
+        """
+        Вспомогательная процедура для выполнения нескольких запросов к базе данных на одном подключении
+            с одной фиксацией транзакции в конце. Используется при инициализации базы данных
+        :param queries: список строк запросов к базе без параметров
+        :return: если все запросы выполнены, то возвращает 0, иначе возвращает -1
+        """
+        conn = self.__connect_directly()
+        if conn is None:
+            return -1
+        try:
+            with conn.cursor() as cursor:
+                for query in queries:
+                    cursor.execute(query)
+            conn.commit()
+            return 0
+        except Error as err:
+            print(f"Error with db: {err}")
+            return -1
+        finally:
+            conn.close()
+
+    def __migrate_table(self) -> int:
+        """
+        Вспомогательная процедура. Приводит таблицу users, созданную прежними версиями сервиса, к текущей структуре:
+            кодировка utf8mb4, формат строк DYNAMIC и индекс idx_title.
+        Структура таблицы читается из information_schema, и выполняется один запрос ALTER TABLE только с теми
+            изменениями, которых не хватает. Поэтому повторный вызов ничего не меняет, а таблица перестраивается
+            не больше одного раза
+        :return: если таблица приведена к текущей структуре или уже ей соответствует, то возвращает 0,
+            иначе возвращает -1
+        """
+        conn = self.__connect_directly()
+        if conn is None:
+            return -1
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute(self.__sql_select_table_format, (DB_NAME,))
+                row_format, charset = cursor.fetchone()
+                cursor.execute(self.__sql_count_title_index, (DB_NAME,))
+                (has_index,) = cursor.fetchone()
+                changes = []
+                if row_format.lower() != "dynamic":
+                    changes.append("ROW_FORMAT=DYNAMIC")  # иначе ключ idx_title длиннее допустимых 767 байт
+                if charset != "utf8mb4":
+                    changes.append("CONVERT TO CHARACTER SET utf8mb4")
+                if not has_index:
+                    changes.append("ADD KEY idx_title (title)")
+                if changes:
+                    print(f"Migrating table users: {', '.join(changes)}")
+                    cursor.execute(f"ALTER TABLE {DB_NAME}.users {', '.join(changes)};")
+            return 0
+        except Error as err:
+            print(f"Error with db: {err}")
+            return -1
+        finally:
+            conn.close()
 
-    def __clear_cache(self) -> None:
+    def init_db(self) -> int:
         """
-        Clears cache. Use it on every DB-changing operation
-        :return: None
+        Инициализация базы данных. Существующая таблица users и её данные сохраняются,
+            а её структура приводится к текущей (см. __migrate_table()).
+        Запросы создания выполняются на одном подключении, чтобы не устанавливать соединение для каждого из них.
+        Если при создании репозитория базы ещё не было и пул не создан, то сразу создаёт пул после инициализации
+        :return: если инициализация успешна, то возвращает 0, иначе возвращает -1
         """
-        self._cache = {}
+        result = self.__make_queries([
+            f"CREATE DATABASE IF NOT EXISTS {DB_NAME};",  # создать базу с именем DB_NAME, если не существует
+            f"USE {DB_NAME};",
+            # далее создать таблицу.
+            #   id: целочисленное без автоматического инкремента (id передаёт клиент)
+            #   title: строковое с максимальной длинной 255
+            #   idx_title: индекс для поиска по ФИО. Индекс InnoDB содержит и первичный ключ,
+            #       поэтому запрос SELECT id, title ... WHERE title = %s читает только индекс, не обращаясь к строкам
+            #   ROW_FORMAT=DYNAMIC допускает ключи индекса до 3072 байт: title в utf8mb4 занимает до 1020 байт
+            #   кодировка utf8mb4 задана явно, чтобы не зависеть от настроек сервера: ФИО может быть и на кириллице
+            """CREATE TABLE IF NOT EXISTS users (
+               id INT PRIMARY KEY,
+               title VARCHAR(255) NOT NULL,
+               KEY idx_title (title)
+               ) ENGINE=InnoDB ROW_FORMAT=DYNAMIC DEFAULT CHARSET=utf8mb4;"""])
+        if result == 0:
+            result = self.__migrate_table()  # таблица могла остаться от прежней версии без индекса и utf8mb4
+        if result == 0 and self.__pool is None:
+            with self.__pool_lock:
+                if self.__pool is None:
+                    self.__pool = self.__create_pool()
+        return result
 
     @measure_time
     def get(self, user_id: int) -> Entity:
         """
         Возвращает одного пользователя по id.
-        Использует простой кэш на словаре.
+        Использует LRU-кэш сущностей; кэшируется и отсутствие пользователя в базе
         :param user_id: целочисленное значение id пользователя
         :return: если пользователь найден в базе, то возвращает сущность пользователя, иначе возвращает пустую сущность
+        :raises RepositoryError: если база недоступна; сбой не кэшируется
         """
-        key = ("get", user_id)
-        if key in self._cache:
-            results = self._cache[key]
-        else:
-            results = self.__make_query("SELECT * FROM users WHERE id = %(user_id)s", user_id=user_id)
-            self._cache[key] = results
+        entity = self._cache.get(user_id)
+        if entity is not None:
+            return entity
 
-        if len(results) == 0:
-            return self.__factory.empty_entity
-        entity = results[0]
-        return self.__factory.create(entity["id"], {"title": entity["title"]})
+        version = self._cache.version
+        results = self.__make_query(self.__sql_select_one, (user_id,))
+        if not results:
+            entity = self.__empty_entity
+        else:
+            _, title = results[0]
+            entity = self.__factory.create(user_id, {"title": title})
+        self._cache.put(user_id, entity, version)
+        return entity
 
     @measure_time
     def list(self) -> list[Entity]:
         """
         Возвращает всех пользователей в базе
         :return: если репозиторий не пуст, то возвращает список c сущностями из него, иначе возвращает []
+        :raises RepositoryError: если база недоступна
         """
-        entities_list = self.__make_query("SELECT * FROM users")
-        if len(entities_list) == 0:
-            return []
-        results = []
-        for entity in entities_list:
-            results.append(self.__factory.create(entity["id"], {"title": entity["title"]}))
-        return results
+        entities_list = self.__make_query(self.__sql_select_all)
+        return [self.__factory.create(user_id, {"title": title}) for user_id, title in entities_list]
+
+    def iter_dicts(self) -> Iterator[dict]:
+        """
+        Потоково перебирает всех пользователей в базе в виде словарей, минуя создание сущностей.
+        Пользователи читаются страницами по FETCH_SIZE строк в порядке id: каждая следующая страница начинается
+            после последнего прочитанного id (WHERE id > %s ORDER BY id LIMIT ...), поэтому каждая страница -
+            короткий запрос по первичному ключу, а расход памяти не зависит от размера таблицы.
+        Подключение берётся из пула только на время чтения страницы, а не на всё время передачи ответа клиенту:
+            медленный клиент не занимает подключение, а при прерывании перебора нечего дочитывать из сокета.
+            Поэтому список не является снимком на один момент времени: пользователи, добавленные или удалённые
+            во время перебора, могут попасть или не попасть в него
+        :return: итератор по словарям вида {"id": user_id, "title": title}
+        :raises RepositoryError: если база недоступна при чтении любой из страниц. Исключение не перехватывается,
+            чтобы обрыв списка на середине не выглядел как его конец
+        """
+        last_id = self.__id_before_first
+        while True:
+            rows = self.__make_query(self.__sql_select_page, (last_id, FETCH_SIZE))
+            for user_id, title in rows:
+                yield {"id": user_id, "title": title}
+            if len(rows) < FETCH_SIZE:
+                return
+            last_id = rows[-1][0]
+
+    @measure_time
+    def id_fits(self, user_id: int) -> bool:
+        """
+        Проверяет, помещается ли id в столбец id INT. Запрос с id вне диапазона MySQL отвергает с ошибкой 1264,
+            поэтому такой id отсекается до обращения к базе
+        :param user_id: целочисленное значение id
+        :return: True, если id лежит в диапазоне столбца INT, иначе False
+        """
+        return self.__id_min <= user_id <= self.__id_max
+
+    def find_by_title(self, title: str) -> list[Entity]:
+        """
+        Ищет пользователей с заданным ФИО запросом к базе, без выборки всей таблицы
+        :param title: строковое значение ФИО, сравнивается на точное совпадение (с учётом регистра и диакритики)
+        :return: список найденных сущностей, упорядоченный по id, или [], если таких нет
+        :raises RepositoryError: если база недоступна
+        """
+        results = self.__make_query(self.__sql_select_by_title, (title, title))
+        return [self.__factory.create(user_id, {"title": title}) for user_id, title in results]
 
     @measure_time
     def add(self, entity: Entity) -> int:
         """
         Добавляет новую сущность в репозиторий
         :param entity: сущность с заполненными параметрами
-        :return: если сущность с таким id не существует, то возвращает 0, иначе возвращает -1
+        :return: если сущность с таким id не существует, то возвращает 0, иначе возвращает -1;
+            при сбое базы возвращает -2, если значения сущности не помещаются в таблицу, то возвращает -3
         """
-        if self.get(entity.id).id == -1:
-            self.__make_query("INSERT INTO users (id, title) VALUES (%(user_id)s, %(title)s);",
-                              user_id=entity.id, title=entity.properties["title"])
-            self.__clear_cache()
-            return 0
-        return -1
+        if not self.id_fits(entity.id):
+            return -3
+        rowcount = self.__make_write(self.__sql_insert_one, (entity.id, entity.properties["title"]))
+        self._cache.pop(entity.id)
+        if rowcount < 0:
+            return rowcount
+        if rowcount == 0:
+            return -1
+        return 0
+
+    @measure_time
+    def add_many(self, entities: list[Entity]) -> int:
+        """
+        Добавляет в репозиторий сразу несколько новых сущностей.
+        Сущности отправляются в базу пачками по BATCH_SIZE штук: executemany() переписывает каждую пачку
+            в один многострочный INSERT, поэтому на пачку тратится один запрос вместо BATCH_SIZE.
+        Все пачки добавляются в одной транзакции. Одна пачка - это один запрос, который атомарен и в режиме autocommit,
+            поэтому транзакция открывается явно, только если пачек несколько
+        :param entities: список сущностей с заполненными параметрами
+        :return: если ни одна из сущностей не существует в репозитории и их id не повторяются,
+            то добавляет все сущности и возвращает 0, иначе не добавляет ни одной и возвращает -1;
+            при сбое базы не добавляет ни одной и возвращает -2,
+            если значения хотя бы одной сущности не помещаются в таблицу, то не добавляет ни одной и возвращает -3
+        """
+        if not all(self.id_fits(entity.id) for entity in entities):
+            return -3
+        conn = self.__get_db_connection()
+        if conn is None:
+            return -2
+        several_batches = len(entities) > BATCH_SIZE
+        try:
+            if several_batches:
+                conn.start_transaction()
+            with conn.cursor() as cursor:
+                for i in range(0, len(entities), BATCH_SIZE):
+                    params = [(entity.id, entity.properties["title"]) for entity in entities[i:i + BATCH_SIZE]]
+                    cursor.executemany(self.__sql_insert_one, params)
+            if several_batches:
+                conn.commit()  # одна транзакция на все пачки
+        except (IntegrityError, DataError) as err:
+            try:
+                conn.rollback()  # при повторяющемся id или неподходящем значении не добавлять ни одной сущности
+            except Error:
+                pass  # подключение потеряно; незафиксированная транзакция откатится сервером
+            return -1 if isinstance(err, IntegrityError) else -3
+        except Error as err:
+            print(f"Error with db: {err}")
+            try:
+                conn.rollback()
+            except Error:
+                pass  # подключение потеряно; незафиксированная транзакция откатится сервером
+            return -2
+        finally:
+            self.__release_db_connection(conn)  # вернуть соединение в пул
+        for entity in entities:
+            self._cache.pop(entity.id)
+        return 0
 
     @measure_time
     def delete(self, user_id: int) -> int:
         """
         Удаляет одну сущность из репозитория по id
         :param user_id: целочисленное значение id сущности
-        :return: если сущность с таким id существует на момент удаления, то возвращает 0, иначе возвращает -1
+        :return: если сущность с таким id существует на момент удаления, то возвращает 0, иначе возвращает -1;
+            при сбое базы возвращает -2
         """
-        if self.get(user_id).id != -1:
-            self.__make_query("DELETE FROM users WHERE id = %(user_id)s;", user_id=user_id)
-            self.__clear_cache()
-            return 0
-        return -1
+        if not self.id_fits(user_id):
+            return -1  # записи с таким id в таблице быть не может
+        rowcount = self.__make_write(self.__sql_delete_one, (user_id,))
+        self._cache.pop(user_id)
+        if rowcount == -2:
+            return -2
+        if rowcount == 0:
+            return -1
+        return 0
 
     @measure_time
     def update(self, entity: Entity) -> int:
         """
         Обновляет хранимую сущность в соответствии с переданным параметром
         :param entity: сущность с заполненными параметрами
-        :return: если сущность с таким id существует, то возвращает обновляет её и возвращает 0, иначе возвращает -1
+        :return: если сущность с таким id существует, то обновляет её и возвращает 0, иначе возвращает -1;
+            при сбое базы возвращает -2, если ФИО не помещается в таблицу, то возвращает -3
         """
-        if self.get(entity.id).id != -1:
-            self.__make_query("UPDATE users SET title = %(title)s WHERE id = %(user_id)s",
-                              user_id=entity.id, title=entity.properties["title"])
-            self.__clear_cache()
-            return 0
-        return -1
+        if not self.id_fits(entity.id):
+            return -1  # записи с таким id в таблице быть не может
+        rowcount = self.__make_write(self.__sql_update_one, (entity.properties["title"], entity.id))
+        self._cache.pop(entity.id)
+        if rowcount < 0:
+            return rowcount
+        if rowcount == 0:
+            return -1
+        return 0
 
 
 class AbstractRepositoryCreator(ABC):
@@ -460,17 +1051,22 @@ class RepositoryCreator(AbstractRepositoryCreator):
             repo_type: содержит имя класса, который будет создаваться этой фабрикой репозиториев. Возможные значения:
                 RepositoryMySQL - хранит сущности в базе MySQL
                 RepositoryRAM - хранит сущности в оперативной памяти
+                RepositoryBytearray - хранит сущности в bytearray
             username: логин для доступа к базе
             password: пароль для доступа к базе
+            pool_size: необязательный, размер пула подключений RepositoryMySQL (от 1 до POOL_SIZE_MAX).
+                Его стоит задать не меньше числа потоков рабочего процесса WSGI-сервера
+        Файл читается и разбирается за один проход; если его не удалось прочитать или разобрать,
+            то используются настройки по умолчанию (репозиторий RepositoryRAM)
         """
 
-        options = {"use_db_repo": False, "username": None, "password": None}  # настройки по умолчанию
+        options = {"repo_type": "RepositoryRAM", "username": None, "password": None,
+                   "pool_size": POOL_SIZE}  # настройки по умолчанию
 
         try:
-            json_file = open(OPTIONS_FILE_PATH)
-            json_object = json.load(json_file)
-            json_file.close()
-        except OSError:
+            with open(OPTIONS_FILE_PATH, "rb") as json_file:
+                json_object = orjson.loads(json_file.read())
+        except (OSError, ValueError):
             print("Got exception while reading options from file")
             return options
 
@@ -481,6 +1077,12 @@ class RepositoryCreator(AbstractRepositoryCreator):
         except KeyError:
             print(f"The file {OPTIONS_FILE_PATH} is not formatted correctly")
 
+        pool_size = json_object.get("pool_size", POOL_SIZE)
+        if isinstance(pool_size, int) and not isinstance(pool_size, bool) and 1 <= pool_size <= POOL_SIZE_MAX:
+            options["pool_size"] = pool_size
+        else:
+            print(f"pool_size must be an integer from 1 to {POOL_SIZE_MAX}, using {POOL_SIZE}")
+
         return options
 
     @classmethod
@@ -71,6 +71,8 @@ if __name__ == '__main__':
 
     tester.sample_test("Получить несуществующую запись запись с id=3", "user/3", get, 404)
 
+    tester.sample_test("Получить запись с нечисловым id", "user/abc", get, 404)
+
     tester.sample_test("Создать пользователя с id, который уже существует в базе", "user/2?title=Test", post, 422)
 
     tester.sample_test("Изменить пользователя, которого не существует в базе", "user/3?title=Test%20Title", patch,
@@ -78,6 +80,29 @@ if __name__ == '__main__':
 
     tester.sample_test("Удалить пользователя, которого не существует в базе", "user/3", delete, 404)
 
+    tester.sample_test("Создать пользователя без ФИО", "user/3", post, 400)
+
+    tester.sample_test("Изменить пользователя на слишком длинное ФИО", "user/2?title=" + "a" * 256, patch, 400)
+
+    tester.sample_test("Пакетно создать пользователей, один из которых уже существует в базе", "user",
+                       lambda url: post(url, json=[{"id": 3, "title": "Test"}, {"id": 2, "title": "Test"}]), 422)
+
+    tester.sample_test("Пакетно создать пользователей с неверным форматом списка", "user",
+                       lambda url: post(url, json={"id": 3, "title": "Test"}), 400)
+
+    # Successful batch
+
+    tester.sample_test("Пакетно создать пользователей с id=3 и id=4", "user",
+                       lambda url: post(url, json=[{"id": 3, "title": "Ivan Groznyi"},
+                                                   {"id": 4, "title": "Ekaterina Velikaya"}]), 204)
+    tester.show_all()
+
+    tester.sample_test("Найти пользователя по ФИО", "user/search?title=Ivan%20Groznyi", get, 200)
+    tester.sample_test("Найти пользователя, которого нет в базе", "user/search?title=Test", get, 404)
+    tester.sample_test("Найти пользователя без указания ФИО", "user/search", get, 400)
+
+    tester.sample_test("", "user/4", delete)
+    tester.sample_test("", "user/3", delete)
     # delete(URL + 'user/2')
     tester.sample_test("", "user/2", delete)  # delete all
     # delete(URL + 'user/1')
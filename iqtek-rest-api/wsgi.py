@@ -0,0 +1,8 @@
+from app import create_app
+
+
+"""
+Точка входа для WSGI-серверов. Пример запуска:
+gunicorn --workers 4 --bind 127.0.0.1:80 wsgi:app
+"""
+app = create_app()